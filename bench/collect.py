@@ -2,18 +2,32 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
 import json
-import re
+import multiprocessing
+import os
+import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Sequence
 
+try:
+  import pyarrow as pa  # type: ignore
+  import pyarrow.csv as pacsv  # type: ignore
+except ImportError:
+  pa = None
+  pacsv = None
+
+try:
+  import orjson  # type: ignore
+  _loads = orjson.loads
+except ImportError:
+  _loads = json.loads
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
-  with path.open("r", encoding="utf-8") as f:
-    return json.load(f)
+  return _loads(path.read_bytes())
 
 
 def _read_single_row_csv(path: Path) -> Dict[str, Any]:
@@ -28,6 +42,9 @@ def _read_single_row_csv(path: Path) -> Dict[str, Any]:
   return dict(rows[0])
 
 
+_TIER_METRICS = ("utilization", "queue_wait_p95_ms", "in_flight_avg")
+
+
 def _read_tiers_wide(path: Path) -> Dict[str, Any]:
   out: Dict[str, Any] = {}
   with path.open("r", encoding="utf-8", newline="") as f:
@@ -36,7 +53,7 @@ def _read_tiers_wide(path: Path) -> Dict[str, Any]:
       provider = str(row.get("provider", "provider"))
       tier_id = str(row.get("tier_id", "x"))
       key_prefix = f"{_sanitize(provider)}_tier{tier_id}"
-      for metric in ("utilization", "queue_wait_p95_ms", "in_flight_avg"):
+      for metric in _TIER_METRICS:
         if metric in row and row[metric] is not None:
           out[f"{key_prefix}_{metric}"] = row[metric]
   return out
@@ -62,22 +79,37 @@ def _parse_ablation_flags(flags: Optional[List[str]]) -> Dict[str, bool]:
   return out
 
 
-_SAN_RE = re.compile(r"[^a-zA-Z0-9_]+")
+class _SanTable(dict):
+  # str.translate table: [A-Za-z0-9_] map to themselves, every other code point (including
+  # anything above U+00FF) to "_"; looked-up misses are cached.
+  def __missing__(self, key: int) -> str:
+    self[key] = "_"
+    return "_"
+
 
+_SAN_TRANS = _SanTable({
+  ord(c): c for c in map(chr, range(128)) if c.isalnum() or c == "_"
+})
 
+
+@functools.lru_cache(maxsize=1024)
 def _sanitize(s: str) -> str:
-  s2 = s.replace("-", "_").replace(".", "_")
-  s2 = _SAN_RE.sub("_", s2)
-  return s2.strip("_") or "x"
+  return s.translate(_SAN_TRANS).strip("_") or "x"
 
 
 def _flatten(prefix: str, d: Dict[str, Any], out: Dict[str, Any]) -> None:
-  for k, v in d.items():
-    key = f"{prefix}{k}" if prefix else str(k)
-    if isinstance(v, dict):
-      _flatten(key + ".", v, out)
-    else:
+  # Iterative depth-first walk; keys come out in the same order as the recursive form.
+  stack = [(prefix, iter(d.items()))]
+  while stack:
+    p, items = stack[-1]
+    for k, v in items:
+      key = f"{p}{k}" if p else str(k)
+      if isinstance(v, dict):
+        stack.append((key + ".", iter(v.items())))
+        break
       out[key] = v
+    else:
+      stack.pop()
 
 
 def _write_rows_csv(path: Path, rows: Sequence[Dict[str, Any]]) -> None:
@@ -119,10 +151,67 @@ def _write_rows_csv(path: Path, rows: Sequence[Dict[str, Any]]) -> None:
 
   path.parent.mkdir(parents=True, exist_ok=True)
   with path.open("w", encoding="utf-8", newline="") as f:
-    w = csv.DictWriter(f, fieldnames=ordered)
-    w.writeheader()
+    w = csv.writer(f)
+    w.writerow(ordered)
     for r in rows:
-      w.writerow({k: ("" if r.get(k) is None else r.get(k)) for k in ordered})
+      get = r.get
+      w.writerow(["" if get(c) is None else get(c) for c in ordered])
+
+
+def _write_parquet_sibling(csv_path: Path) -> Optional[Path]:
+  """Write a typed, compressed copy of runs.csv next to it; None if pyarrow is unavailable."""
+  if pa is None:
+    return None
+  try:
+    import pyarrow.parquet as pq  # type: ignore
+  except ImportError:
+    return None
+  # Re-read with type inference so column types match what pandas.read_csv would produce.
+  out_path = csv_path.with_suffix(".parquet")
+  opts = pacsv.ConvertOptions(strings_can_be_null=True)
+  pq.write_table(pacsv.read_csv(csv_path, convert_options=opts), out_path, compression="snappy")
+  return out_path
+
+
+def _process_run(run_dir: Path) -> Optional[Dict[str, Any]]:
+  meta_path = run_dir / "meta.json"
+  out_dir = run_dir / "out"
+  summary_path = out_dir / "summary.csv"
+  tiers_path = out_dir / "tiers.csv"
+
+  if not meta_path.exists():
+    return None
+  meta = _load_json(meta_path)
+
+  row: Dict[str, Any] = {}
+  row["run_id"] = meta.get("run_id", run_dir.name)
+  row["run_dir"] = str(run_dir)
+  row["exit_code"] = meta.get("exit_code")
+  row["wall_time_s"] = meta.get("wall_time_s")
+  row["start_time_unix_s"] = meta.get("start_time_unix_s")
+  row["end_time_unix_s"] = meta.get("end_time_unix_s")
+
+  row["ablation_name"] = meta.get("ablation_name")
+  ablation_flags = meta.get("ablation_flags") or []
+  if ablation_flags:
+    row["ablation_flags"] = " ".join(str(x) for x in ablation_flags)
+  for k, v in _parse_ablation_flags(ablation_flags).items():
+    row[k] = v
+
+  if meta.get("sim_binary_version") is not None:
+    row["sim_binary_version"] = meta["sim_binary_version"]
+
+  params = meta.get("params") or {}
+  if isinstance(params, dict):
+    _flatten("", params, row)
+
+  if summary_path.exists():
+    summary = _read_single_row_csv(summary_path)
+    for k, v in summary.items():
+      row[k] = v
+  if tiers_path.exists():
+    row.update(_read_tiers_wide(tiers_path))
+  return row
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -147,47 +236,14 @@ def main(argv: Optional[List[str]] = None) -> int:
   if not runs_dir.exists():
     raise SystemExit(f"runs directory not found: {runs_dir}")
 
+  run_dirs = [p for p in runs_dir.iterdir() if p.is_dir()]
   rows: List[Dict[str, Any]] = []
-  for run_dir in sorted([p for p in runs_dir.iterdir() if p.is_dir()]):
-    meta_path = run_dir / "meta.json"
-    out_dir = run_dir / "out"
-    summary_path = out_dir / "summary.csv"
-    tiers_path = out_dir / "tiers.csv"
-
-    if not meta_path.exists():
-      continue
-    meta = _load_json(meta_path)
-
-    row: Dict[str, Any] = {}
-    row["run_id"] = meta.get("run_id", run_dir.name)
-    row["run_dir"] = str(run_dir)
-    row["exit_code"] = meta.get("exit_code")
-    row["wall_time_s"] = meta.get("wall_time_s")
-    row["start_time_unix_s"] = meta.get("start_time_unix_s")
-    row["end_time_unix_s"] = meta.get("end_time_unix_s")
-
-    row["ablation_name"] = meta.get("ablation_name")
-    ablation_flags = meta.get("ablation_flags") or []
-    if ablation_flags:
-      row["ablation_flags"] = " ".join(str(x) for x in ablation_flags)
-    for k, v in _parse_ablation_flags(ablation_flags).items():
-      row[k] = v
-
-    if meta.get("sim_binary_version") is not None:
-      row["sim_binary_version"] = meta["sim_binary_version"]
-
-    params = meta.get("params") or {}
-    if isinstance(params, dict):
-      _flatten("", params, row)
-
-    if summary_path.exists():
-      summary = _read_single_row_csv(summary_path)
-      for k, v in summary.items():
-        row[k] = v
-    if tiers_path.exists():
-      row.update(_read_tiers_wide(tiers_path))
-
-    rows.append(row)
+  if run_dirs:
+    procs = max(1, min(os.cpu_count() or 1, len(run_dirs)))
+    with multiprocessing.Pool(procs) as pool:
+      rows = [r for r in pool.imap_unordered(_process_run, run_dirs, chunksize=16) if r]
+  # Same order as a sorted walk over runs/.
+  rows.sort(key=lambda r: r["run_dir"])
 
   if not rows:
     raise SystemExit(f"no runs found under: {runs_dir}")
@@ -200,6 +256,15 @@ def main(argv: Optional[List[str]] = None) -> int:
 
   _write_rows_csv(out_csv, rows)
   print(f"wrote: {out_csv} rows={len(rows)}")
+  # The Parquet copy is optional: a failure there must not fail an already-written collect.
+  try:
+    out_parquet = _write_parquet_sibling(out_csv)
+  except Exception as e:
+    out_csv.with_suffix(".parquet").unlink(missing_ok=True)
+    print(f"warning: skipped {out_csv.with_suffix('.parquet')}: {e}", file=sys.stderr)
+    out_parquet = None
+  if out_parquet is not None:
+    print(f"wrote: {out_parquet}")
   return 0
 
 
@@ -3,14 +3,32 @@ from __future__ import annotations
 import argparse
 import csv
 import html
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, TextIO
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
+# Rows rendered into the inline HTML table; larger sweeps link to the full CSV.
+MAX_TABLE_ROWS = 500
+
 
 def _read_csv_rows(path: Path) -> tuple[list[str], list[dict[str, str]]]:
+  try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pacsv  # type: ignore
+  except Exception:
+    pa = None
+  if pa is not None:
+    with path.open("r", encoding="utf-8", newline="") as f:
+      headers = next(csv.reader(f), [])
+    if not headers:
+      return [], []
+    # All-string columns: cells stay exactly as written (empty cells are "", not null).
+    opts = pacsv.ConvertOptions(column_types={h: pa.string() for h in headers})
+    return headers, pacsv.read_csv(path, convert_options=opts).to_pylist()
+
   with path.open("r", encoding="utf-8", newline="") as f:
     r = csv.DictReader(f)
     headers = [h for h in (r.fieldnames or [])]
@@ -20,12 +38,33 @@ def _read_csv_rows(path: Path) -> tuple[list[str], list[dict[str, str]]]:
   return headers, rows
 
 
-def _try_load_pandas_df(path: Path):
+# Columns the plots read. Labels stay text; metrics and join keys are parsed with
+# pd.to_numeric, so missing cells become NaN just as pd.read_csv would make them.
+_PLOT_TEXT_COLS = ("policy", "ablation_name")
+_PLOT_NUMERIC_COLS = (
+  "workflows", "seed", "makespan_p50_ms", "makespan_p95_ms", "makespan_p99_ms", "cost_mean",
+)
+
+
+def _try_build_plot_df(headers: list[str], rows: list[dict[str, str]]):
   try:
     import pandas as pd  # type: ignore
   except Exception:
     return None
-  return pd.read_csv(path)
+  data = {}
+  for c in headers:
+    if c in _PLOT_TEXT_COLS:
+      data[c] = pd.Series([r[c] for r in rows], dtype=object).replace("", float("nan"))
+    elif c in _PLOT_NUMERIC_COLS:
+      data[c] = pd.to_numeric(pd.Series([r[c] for r in rows], dtype=object), errors="coerce")
+  return pd.DataFrame(data)
+
+
+def _categorize(df) -> None:
+  # Low-cardinality label columns: integer codes make the masks and groupbys cheaper.
+  for c in ("policy", "ablation_name"):
+    if c in df.columns:
+      df[c] = df[c].astype(str).astype("category")
 
 
 def _try_enable_matplotlib() -> bool:
@@ -61,34 +100,38 @@ def _save_baseline_policy_plots(df, assets_dir: Path) -> List[str]:
   metrics = [("makespan_p50_ms", "Makespan p50 (ms)"),
              ("makespan_p95_ms", "Makespan p95 (ms)"),
              ("makespan_p99_ms", "Makespan p99 (ms)")]
+  metric_cols = [col for col, _ in metrics]
+  value_cols = metric_cols + (["cost_mean"] if "cost_mean" in base.columns else [])
+
+  # Aggregate once and share one policy axis across every subplot. Sums and
+  # counts per (workflows, policy) give exact means at both granularities.
+  policies = sorted(base["policy"].unique().tolist())
+  x = list(range(len(policies)))
+  totals = base.groupby(["workflows", "policy"], dropna=False, observed=True)[value_cols].agg(["sum", "count"])
+  policy_totals = totals.groupby(level="policy", observed=True).sum()
+  by_policy = policy_totals.xs("sum", axis=1, level=1) / policy_totals.xs("count", axis=1, level=1)
+  by_policy = by_policy.reindex(index=policies)
 
   if len(workflows_vals) > 1:
+    by_wf = (totals.xs("sum", axis=1, level=1) / totals.xs("count", axis=1, level=1)).unstack("policy")
+    by_wf = by_wf.reindex(index=workflows_vals, columns=pd.MultiIndex.from_product([value_cols, policies]))
     n_wf = len(workflows_vals)
     fig, axes = plt.subplots(n_wf, 3, figsize=(16, 4 * n_wf), sharex="col", sharey="row")
     if n_wf == 1:
       axes = axes.reshape(1, -1)
-    for i, wf in enumerate(workflows_vals):
-      sub = base[base["workflows"] == wf]
+    for i, (wf, wf_row) in enumerate(by_wf.iterrows()):
       for j, (col, title) in enumerate(metrics):
         ax = axes[i, j]
-        grp = sub.groupby("policy")[col].mean().reset_index()
-        policies = sorted(grp["policy"].astype(str).tolist())
-        vals = [float(grp[grp["policy"] == p][col].iloc[0]) for p in policies]
-        x = range(len(policies))
-        ax.bar(list(x), vals)
-        ax.set_xticks(list(x))
+        ax.bar(x, wf_row[col].to_numpy(dtype=float))
+        ax.set_xticks(x)
         ax.set_xticklabels(policies, rotation=20, ha="right")
         ax.set_title(f"{title} (workflows={wf})")
         ax.grid(axis="y", alpha=0.25)
   else:
     fig, axes = plt.subplots(1, 3, figsize=(16, 4), sharey=False)
     for ax, (col, title) in zip(axes, metrics):
-      plot_df = base.groupby("policy")[col].mean().reset_index()
-      policies = sorted(plot_df["policy"].astype(str).tolist())
-      vals = [float(plot_df[plot_df["policy"] == p][col].iloc[0]) for p in policies]
-      x = range(len(policies))
-      ax.bar(list(x), vals)
-      ax.set_xticks(list(x))
+      ax.bar(x, by_policy[col].to_numpy(dtype=float))
+      ax.set_xticks(x)
       ax.set_xticklabels(policies, rotation=20, ha="right")
       ax.set_title(title)
       ax.grid(axis="y", alpha=0.25)
@@ -101,12 +144,8 @@ def _save_baseline_policy_plots(df, assets_dir: Path) -> List[str]:
 
   if "cost_mean" in base.columns:
     fig, ax = plt.subplots(1, 1, figsize=(6.5, 4))
-    cost = base.groupby("policy")["cost_mean"].mean().reset_index()
-    policies = sorted(cost["policy"].astype(str).tolist())
-    x = range(len(policies))
-    vals = [float(cost[cost["policy"] == p]["cost_mean"].iloc[0]) for p in policies]
-    ax.bar(list(x), vals)
-    ax.set_xticks(list(x))
+    ax.bar(x, by_policy["cost_mean"].to_numpy(dtype=float))
+    ax.set_xticks(x)
     ax.set_xticklabels(policies, rotation=20, ha="right")
     ax.set_title("Cost mean (baseline)")
     ax.grid(axis="y", alpha=0.25)
@@ -128,7 +167,7 @@ def _save_full_ablation_delta_plot(df, assets_dir: Path) -> Optional[str]:
 
   d = df.copy()
   d["makespan_p95_ms"] = pd.to_numeric(d["makespan_p95_ms"], errors="coerce")
-  d = d[d["policy"].astype(str) == "full"].dropna(subset=["makespan_p95_ms"])
+  d = d[d["policy"] == "full"].dropna(subset=["makespan_p95_ms"])
   if d.empty:
     return None
 
@@ -138,15 +177,12 @@ def _save_full_ablation_delta_plot(df, assets_dir: Path) -> Optional[str]:
 
   join_keys = [k for k in ("workflows", "seed") if k in d.columns]
   if join_keys:
-    merged = d.merge(
-      base[join_keys + ["makespan_p95_ms"]].rename(columns={"makespan_p95_ms": "baseline_p95"}),
-      on=join_keys,
-      how="left",
-    )
-    merged["ratio"] = merged["makespan_p95_ms"] / merged["baseline_p95"]
-    ratios = merged.groupby("ablation_name")["ratio"].mean().reset_index()
+    baseline_s = base.groupby(join_keys, observed=True)["makespan_p95_ms"].mean()
+    d["baseline_p95"] = d.set_index(join_keys).index.map(baseline_s).to_numpy()
+    d["ratio"] = d["makespan_p95_ms"] / d["baseline_p95"]
+    ratios = d.groupby("ablation_name", observed=True)["ratio"].mean().reset_index()
   else:
-    means = d.groupby("ablation_name")["makespan_p95_ms"].mean().reset_index()
+    means = d.groupby("ablation_name", observed=True)["makespan_p95_ms"].mean().reset_index()
     baseline_mean = float(base["makespan_p95_ms"].mean())
     means["ratio"] = means["makespan_p95_ms"] / baseline_mean
     ratios = means[["ablation_name", "ratio"]]
@@ -190,16 +226,19 @@ def _write_index_html(
   out_path: Path,
   title: str,
   images: List[str],
-  table_html: str,
+  table_headers: list[str],
+  rows: list[dict[str, str]],
   summary_html: str = "",
+  note_html: str = "",
 ) -> None:
   imgs = "\n".join(
     f'<div class="card"><img src="assets/{html.escape(img)}" alt="{html.escape(img)}"></div>'
     for img in images
   )
   out_path.parent.mkdir(parents=True, exist_ok=True)
-  out_path.write_text(
-    f"""<!doctype html>
+  with out_path.open("w", encoding="utf-8") as f:
+    f.write(
+      f"""<!doctype html>
 <html>
 <head>
   <meta charset="utf-8" />
@@ -227,45 +266,56 @@ def _write_index_html(
     {imgs}
   </div>
   <h2>Run-level results</h2>
-  {table_html}
+  """
+    )
+    if note_html:
+      f.write(note_html + "\n")
+    _rows_to_html_table(f, table_headers, rows)
+    f.write(
+      """
   <script>
-    function sortTable(table, colIndex) {{
+    function sortTable(table, colIndex) {
       const tbody = table.tBodies[0];
       const rows = Array.from(tbody.rows);
       const asc = table.getAttribute("data-sort-dir") !== "asc";
-      rows.sort((a, b) => {{
+      rows.sort((a, b) => {
         const av = a.cells[colIndex]?.innerText ?? "";
         const bv = b.cells[colIndex]?.innerText ?? "";
         const an = parseFloat(av), bn = parseFloat(bv);
         const bothNum = !isNaN(an) && !isNaN(bn);
         if (bothNum) return asc ? (an - bn) : (bn - an);
         return asc ? av.localeCompare(bv) : bv.localeCompare(av);
-      }});
+      });
       for (const r of rows) tbody.appendChild(r);
       table.setAttribute("data-sort-dir", asc ? "asc" : "desc");
-    }}
-    for (const th of document.querySelectorAll("table thead th")) {{
-      th.addEventListener("click", () => {{
+    }
+    for (const th of document.querySelectorAll("table thead th")) {
+      th.addEventListener("click", () => {
         const table = th.closest("table");
         sortTable(table, th.cellIndex);
-      }});
-    }}
+      });
+    }
   </script>
 </body>
 </html>
-""",
-    encoding="utf-8",
-  )
+"""
+    )
 
 
-def _rows_to_html_table(headers: list[str], rows: list[dict[str, str]]) -> str:
-  ths = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
-  body_rows = []
-  for r in rows:
-    tds = "".join(f"<td>{html.escape(r.get(h, ''))}</td>" for h in headers)
-    body_rows.append(f"<tr>{tds}</tr>")
-  tbody = "\n".join(body_rows)
-  return f"<table><thead><tr>{ths}</tr></thead><tbody>{tbody}</tbody></table>"
+def _rows_to_html_table(out: TextIO, headers: list[str], rows: list[dict[str, str]]) -> None:
+  out.write("<table><thead><tr>")
+  out.write("".join(f"<th>{html.escape(h)}</th>" for h in headers))
+  out.write("</tr></thead><tbody>")
+  for i, r in enumerate(rows):
+    if i:
+      out.write("\n")
+    out.write("<tr>")
+    for h in headers:
+      out.write("<td>")
+      out.write(html.escape(r.get(h, "")))
+      out.write("</td>")
+    out.write("</tr>")
+  out.write("</tbody></table>")
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -297,13 +347,16 @@ def main(argv: Optional[List[str]] = None) -> int:
   assets_dir = out_dir / "assets"
   assets_dir.mkdir(parents=True, exist_ok=True)
 
+  # runs.csv is parsed once, as text: the table shows cells exactly as written and the
+  # plot frame is derived from the same rows.
   headers, rows = _read_csv_rows(runs_csv)
-  df = _try_load_pandas_df(runs_csv)
+  df = _try_build_plot_df(headers, rows)
   have_mpl = _try_enable_matplotlib()
 
   images: List[str] = []
   notes: List[str] = []
   if df is not None and have_mpl:
+    _categorize(df)
     images += _save_baseline_policy_plots(df, assets_dir)
     ab_img = _save_full_ablation_delta_plot(df, assets_dir)
     if ab_img:
@@ -324,20 +377,32 @@ def main(argv: Optional[List[str]] = None) -> int:
   table_headers = [h for h in key_cols if h in headers]
   if not table_headers:
     table_headers = headers
-  table_html = _rows_to_html_table(table_headers, rows)
 
+  note_html = ""
   if notes:
     note_html = "<div class='card'><b>Notes</b><ul>" + "".join(
       f"<li>{html.escape(n)}</li>" for n in notes
     ) + "</ul></div>"
-    table_html = note_html + "\n" + table_html
+
+  # Keep the inline table small enough to render quickly; link the full CSV instead.
+  table_rows = rows
+  if len(rows) > MAX_TABLE_ROWS:
+    table_rows = rows[:MAX_TABLE_ROWS]
+    csv_href = Path(os.path.relpath(runs_csv, out_dir)).as_posix()
+    truncated_html = (
+      f"<div class='hint'>Showing the first {MAX_TABLE_ROWS} of {len(rows)} runs. "
+      f"Full table: <a href=\"{html.escape(csv_href)}\">{html.escape(runs_csv.name)}</a></div>"
+    )
+    note_html = f"{note_html}\n{truncated_html}" if note_html else truncated_html
 
   _write_index_html(
     out_dir / "index.html",
     f"Bench report: {exp_dir.name}",
     images,
-    table_html,
+    table_headers,
+    table_rows,
     summary_html,
+    note_html,
   )
   print(f"wrote: {out_dir / 'index.html'}")
   return 0
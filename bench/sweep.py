@@ -1,49 +1,97 @@
 from __future__ import annotations
 
 import argparse
-import concurrent.futures
+import functools
 import hashlib
 import json
+import math
 import os
+import re
 import shlex
-import subprocess
+import signal
 import sys
 import time
-from dataclasses import dataclass
-from itertools import product
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice, product
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+try:
+  import orjson  # type: ignore
+except ImportError:
+  orjson = None
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
 
-def _load_json(path: Path) -> Dict[str, Any]:
-  with path.open("r", encoding="utf-8") as f:
+def _load_json(path: Union[str, Path]) -> Dict[str, Any]:
+  if orjson is not None:
+    with open(path, "rb") as f:
+      return orjson.loads(f.read())
+  with open(path, "r", encoding="utf-8") as f:
     return json.load(f)
 
 
+# Input to the run-id hash: stays on stdlib json so ids are byte-stable whether or not
+# orjson is installed. Callers build payloads in canonical (sorted) key order.
 def _json_dumps_stable(obj: Any) -> str:
-  return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+  return json.dumps(obj, separators=(",", ":"), ensure_ascii=True)
+
+
+# Canonical form for in-process comparisons only (resume checks), so the encoder may vary.
+# Returns bytes: orjson produces them directly and the comparison is a plain memcmp.
+def _json_dumps_canon(obj: Any, sort_keys: bool = False) -> bytes:
+  if orjson is not None:
+    return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+  return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=True).encode("ascii")
+
+
+def _canon_dict(d: Dict[str, Any]) -> Dict[str, Any]:
+  return {k: _canon_value(v) for k, v in sorted(d.items())}
 
 
+def _canon_value(v: Any) -> Any:
+  if isinstance(v, dict):
+    return _canon_dict(v)
+  if isinstance(v, list):
+    return [_canon_value(x) for x in v]
+  return v
+
+
+# Unicode \w is exactly str.isalnum() plus "_", so this matches the old per-char loop:
+# every char other than alnum, "-", "_", "." becomes "_" (runs are not collapsed).
+_TOKEN_BAD_RE = re.compile(r"[^\w.-]")
+
+
+@functools.lru_cache(maxsize=4096)
 def _sanitize_token(s: str) -> str:
-  out = []
-  for ch in s:
-    if ch.isalnum() or ch in ("-", "_", "."):
-      out.append(ch)
-    else:
-      out.append("_")
-  return "".join(out).strip("_")
+  return _TOKEN_BAD_RE.sub("_", s).strip("_")
 
 
-def _stable_run_id(params: Dict[str, Any], ablation_name: str, ablation_flags: List[str]) -> str:
+# Both produce 12 hex chars. sha1 stays the default so existing bench dirs keep their run ids.
+_RUN_ID_HASHES = ("sha1", "blake2b")
+
+
+def _stable_run_id(
+  params: Dict[str, Any],
+  ablation_name: str,
+  ablation_flags: Tuple[str, ...],
+  hash_name: str = "sha1",
+) -> str:
+  # Keys in sorted order; params must already be canonical (see _canon_dict).
   payload = {
-    "params": params,
-    "ablation_name": ablation_name,
     "ablation_flags": ablation_flags,
+    "ablation_name": ablation_name,
+    "params": params,
   }
-  h = hashlib.sha1(_json_dumps_stable(payload).encode("utf-8")).hexdigest()[:12]
+  data = _json_dumps_stable(payload).encode("utf-8")
+  if hash_name == "blake2b":
+    h = hashlib.blake2b(data, digest_size=6).hexdigest()
+  else:
+    h = hashlib.sha1(data).hexdigest()[:12]
   policy = _sanitize_token(str(params.get("policy", "unknown")))
   workflows = params.get("workflows", "x")
   seed = params.get("seed", "x")
@@ -55,24 +103,67 @@ def _bool_flag(enabled: bool, flag: str) -> List[str]:
   return [flag] if enabled else []
 
 
-def _build_cmd(sim_binary: str, params: Dict[str, Any], out_dir: Path, ablation_flags: List[str]) -> List[str]:
-  cmd: List[str] = [sim_binary]
-  cmd += ["--workflows", str(params["workflows"])]
-  cmd += ["--pdfs", str(params["pdfs"])]
-  cmd += ["--iters", str(params["iters"])]
-  cmd += ["--subqueries", str(params["subqueries"])]
-  cmd += ["--policy", str(params["policy"])]
-  cmd += ["--seed", str(params["seed"])]
-  cmd += ["--time_scale", str(params["time_scale"])]
-  cmd += ["--heavy_tail_prob", str(params["heavy_tail_prob"])]
-  cmd += ["--heavy_tail_mult", str(params["heavy_tail_mult"])]
-  cmd += _bool_flag(bool(params.get("enable_model_routing", False)), "--enable_model_routing")
-  cmd += list(ablation_flags)
-  cmd += ["--out_dir", str(out_dir)]
+# (param, flag) pairs in the order they appear on the sim command line.
+_VALUE_FLAGS: Tuple[Tuple[str, str], ...] = (
+  ("workflows", "--workflows"),
+  ("pdfs", "--pdfs"),
+  ("iters", "--iters"),
+  ("subqueries", "--subqueries"),
+  ("policy", "--policy"),
+  ("seed", "--seed"),
+  ("time_scale", "--time_scale"),
+  ("heavy_tail_prob", "--heavy_tail_prob"),
+  ("heavy_tail_mult", "--heavy_tail_mult"),
+)
+_VALUE_FLAG_BY_KEY = dict(_VALUE_FLAGS)
+
+
+def _cmd_template(sim_binary: str, common: Dict[str, Any], varying: Iterable[str]) -> List[Any]:
+  # Segments of the command line, in order: a list[str] of args that are identical for
+  # every run in the sweep, or the name of a param to render per run.
+  varying = set(varying)
+  template: List[Any] = []
+  fixed: List[str] = [sim_binary]
+  for k, flag in _VALUE_FLAGS:
+    if k in varying:
+      template.append(fixed)
+      template.append(k)
+      fixed = []
+    else:
+      fixed += [flag, str(common[k])]
+  if "enable_model_routing" in varying:
+    template.append(fixed)
+    template.append("enable_model_routing")
+    fixed = []
+  else:
+    fixed += _bool_flag(bool(common.get("enable_model_routing", False)), "--enable_model_routing")
+  template.append(fixed)
+  return [seg for seg in template if seg != []]
+
+
+def _build_cmd(
+  template: List[Any], params: Dict[str, Any], out_dir: str, ablation_flags: Tuple[str, ...]
+) -> List[str]:
+  cmd: List[str] = []
+  for seg in template:
+    if isinstance(seg, list):
+      cmd += seg
+    elif seg == "enable_model_routing":
+      cmd += _bool_flag(bool(params.get("enable_model_routing", False)), "--enable_model_routing")
+    else:
+      cmd += [_VALUE_FLAG_BY_KEY[seg], str(params[seg])]
+  cmd += ablation_flags
+  cmd += ["--out_dir", out_dir]
   return cmd
 
 
-def _expand_runs(cfg: Dict[str, Any]) -> List[Tuple[Dict[str, Any], str, List[str]]]:
+_REQUIRED_PARAMS = ("workflows", "pdfs", "iters", "subqueries", "policy", "seed", "time_scale",
+                    "heavy_tail_prob", "heavy_tail_mult")
+
+
+def _parse_matrix(
+  cfg: Dict[str, Any],
+) -> Tuple[Dict[str, Any], List[str], List[List[Any]], List[Any], List[Tuple[str, Tuple[str, ...]]]]:
   common: Dict[str, Any] = dict(cfg.get("common_args", {}))
   matrix: Dict[str, Any] = dict(cfg.get("matrix", {}))
 
@@ -92,101 +183,241 @@ def _expand_runs(cfg: Dict[str, Any]) -> List[Tuple[Dict[str, Any], str, List[st
       raise ValueError(f"matrix.{k} must be a non-empty list")
     value_lists.append(v)
 
-  runs: List[Tuple[Dict[str, Any], str, List[str]]] = []
-  for combo in product(*value_lists) if value_lists else [()]:
+  # Every run has exactly the common_args keys, the matrix keys and seed, so one check covers all.
+  effective_keys = set(common) | set(keys) | {"seed"}
+  for k in _REQUIRED_PARAMS:
+    if k not in effective_keys:
+      raise ValueError(f"missing required param '{k}' (set in common_args or matrix)")
+
+  # Identical flag lists share one tuple, which every spec of that ablation then references.
+  shared_flags: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+  parsed_ablations: List[Tuple[str, Tuple[str, ...]]] = []
+  for ab in ablations:
+    if not isinstance(ab, dict) or "name" not in ab:
+      raise ValueError("each ablation must be an object with at least a 'name'")
+    name = str(ab["name"])
+    flags = ab.get("flags", [])
+    if flags is None:
+      flags = []
+    if not isinstance(flags, list):
+      raise ValueError(f"ablation.flags must be a list for {name}")
+    t = tuple(str(x) for x in flags)
+    parsed_ablations.append((name, shared_flags.setdefault(t, t)))
+
+  return common, keys, value_lists, seeds, parsed_ablations
+
+
+def _planned_runs_count(cfg: Dict[str, Any]) -> int:
+  _, _, value_lists, seeds, ablations = _parse_matrix(cfg)
+  return len(seeds) * len(ablations) * math.prod(len(v) for v in value_lists)
+
+
+# combo_range: (start, stop) slice of the matrix Cartesian product, for sharded expansion.
+def _expand_runs(
+  cfg: Dict[str, Any], combo_range: Optional[Tuple[int, int]] = None
+) -> Iterator[Tuple[Dict[str, Any], str, Tuple[str, ...]]]:
+  # Yields canonical params (str policy, sorted keys); one dict is shared by all ablations of a
+  # (combo, seed) pair, so consumers must not mutate it.
+  common, keys, value_lists, seeds, ablations = _parse_matrix(cfg)
+  combos: Iterable[Tuple[Any, ...]] = product(*value_lists) if value_lists else [()]
+  if combo_range is not None:
+    combos = islice(combos, combo_range[0], combo_range[1])
+  for combo in combos:
     base_params = dict(common)
     for k, v in zip(keys, combo):
       base_params[k] = v
+    base_params["policy"] = str(base_params["policy"])
     for seed in seeds:
-      params = dict(base_params)
-      params["seed"] = seed
-      for ab in ablations:
-        if not isinstance(ab, dict) or "name" not in ab:
-          raise ValueError("each ablation must be an object with at least a 'name'")
-        name = str(ab["name"])
-        flags = ab.get("flags", [])
-        if flags is None:
-          flags = []
-        if not isinstance(flags, list):
-          raise ValueError(f"ablation.flags must be a list for {name}")
-        runs.append((params, name, [str(x) for x in flags]))
-
-  required = ["workflows", "pdfs", "iters", "subqueries", "policy", "seed", "time_scale",
-              "heavy_tail_prob", "heavy_tail_mult"]
-  for (p, _, _) in runs:
-    for k in required:
-      if k not in p:
-        raise ValueError(f"missing required param '{k}' (set in common_args or matrix)")
-  return runs
+      base_params["seed"] = seed
+      params = _canon_dict(base_params)
+      for name, flags in ablations:
+        yield (params, name, flags)
 
 
 @dataclass(frozen=True)
 class RunSpec:
   params: Dict[str, Any]
   ablation_name: str
-  ablation_flags: List[str]
+  ablation_flags: Tuple[str, ...]
   run_id: str
-  run_dir: Path
-  out_dir: Path
+  # Plain strings: Path objects are only built at the few call sites that need them.
+  run_dir: str
+  out_dir: str
   cmd: List[str]
+  # Canonical JSON of the fields _meta_matches compares; computed once per spec.
+  canon_want: bytes = field(default=b"", repr=False, compare=False)
+
 
+# Sorted, so payloads built from these keys are canonical by construction.
+_META_MATCH_KEYS = ("ablation_flags", "ablation_name", "cmd", "params")
 
-def _make_run_specs(cfg: Dict[str, Any], exp_dir: Path) -> List[RunSpec]:
+
+def _meta_payload(
+  params: Dict[str, Any], ablation_name: str, ablation_flags: Tuple[str, ...], cmd: List[str]
+) -> Dict[str, Any]:
+  return {
+    "ablation_flags": ablation_flags,
+    "ablation_name": ablation_name,
+    "cmd": cmd,
+    "params": params,
+  }
+
+
+def _iter_runs(
+  cfg: Dict[str, Any], exp_dir: Path, combo_range: Optional[Tuple[int, int]] = None
+) -> Iterator[Tuple[Dict[str, Any], str, Tuple[str, ...], str, str, str, List[str]]]:
   sim_binary = str(cfg.get("sim_binary", "./build/agent_sched_sim"))
-  runs = _expand_runs(cfg)
-  specs: List[RunSpec] = []
+  hash_name = str(cfg.get("run_id_hash", "sha1"))
+  if hash_name not in _RUN_ID_HASHES:
+    raise ValueError(f"run_id_hash must be one of {', '.join(_RUN_ID_HASHES)}")
+  runs = _expand_runs(cfg, combo_range)
+  # Matrix keys and the seed change per run; everything else comes from common_args.
+  common = dict(cfg.get("common_args", {}))
+  if "policy" in common:
+    common["policy"] = str(common["policy"])
+  varying = (set(cfg.get("matrix", {})) - {"seeds", "ablations"}) | {"seed"}
+  # Built on the first run, after _expand_runs has validated the required params.
+  template: Optional[List[Any]] = None
+  runs_prefix = os.path.join(str(exp_dir), "runs", "")
   for params, ablation_name, ablation_flags in runs:
-    params2 = dict(params)
-    params2["policy"] = str(params2["policy"])
-    run_id = _stable_run_id(params2, ablation_name, ablation_flags)
-    run_dir = exp_dir / "runs" / run_id
-    out_dir = run_dir / "out"
-    cmd = _build_cmd(sim_binary, params2, out_dir, ablation_flags)
-    specs.append(RunSpec(params2, ablation_name, ablation_flags, run_id, run_dir, out_dir, cmd))
-  return specs
+    if template is None:
+      template = _cmd_template(sim_binary, common, varying)
+    run_id = _stable_run_id(params, ablation_name, ablation_flags, hash_name)
+    run_dir = runs_prefix + run_id
+    out_dir = run_dir + os.sep + "out"
+    cmd = _build_cmd(template, params, out_dir, ablation_flags)
+    yield params, ablation_name, ablation_flags, run_id, run_dir, out_dir, cmd
+
+
+def _make_run_specs(
+  cfg: Dict[str, Any], exp_dir: Path, combo_range: Optional[Tuple[int, int]] = None
+) -> Iterator[RunSpec]:
+  runs = _iter_runs(cfg, exp_dir, combo_range)
+  for params, ablation_name, ablation_flags, run_id, run_dir, out_dir, cmd in runs:
+    canon_want = _json_dumps_canon(_meta_payload(params, ablation_name, ablation_flags, cmd))
+    yield RunSpec(params, ablation_name, ablation_flags, run_id, run_dir, out_dir, cmd, canon_want)
+
+
+# Below this many runs, pool startup and pickling the specs back outweigh the hashing saved.
+_PARALLEL_SPECS_MIN_RUNS = 50000
+
+
+def _make_run_specs_chunk(cfg: Dict[str, Any], exp_dir: Path, start: int, stop: int) -> List[RunSpec]:
+  return list(_make_run_specs(cfg, exp_dir, (start, stop)))
+
+
+# Same specs, in the same order, as _make_run_specs; large sweeps are built across processes
+# in contiguous slices of the matrix combos.
+def _iter_run_specs(cfg: Dict[str, Any], exp_dir: Path, planned_runs: int) -> Iterator[RunSpec]:
+  n_combos = math.prod(len(v) for v in _parse_matrix(cfg)[2])
+  workers = min(os.cpu_count() or 1, n_combos)
+  if planned_runs < _PARALLEL_SPECS_MIN_RUNS or workers < 2:
+    yield from _make_run_specs(cfg, exp_dir)
+    return
+  n_chunks = min(n_combos, workers * 4)
+  bounds = [n_combos * i // n_chunks for i in range(n_chunks + 1)]
+  with ProcessPoolExecutor(max_workers=workers) as ex:
+    futs = [ex.submit(_make_run_specs_chunk, cfg, exp_dir, bounds[i], bounds[i + 1]) for i in range(n_chunks)]
+    for fut in futs:
+      yield from fut.result()
+
+
+# Dry-run planning only needs what gets printed: no RunSpec or resume payload per run.
+def _iter_plan(cfg: Dict[str, Any], exp_dir: Path) -> Iterator[Tuple[str, str, List[str]]]:
+  for _, _, _, run_id, run_dir, _, cmd in _iter_runs(cfg, exp_dir):
+    yield run_id, run_dir, cmd
 
 
 def _meta_matches(meta: Dict[str, Any], spec: RunSpec) -> bool:
-  want = {
-    "params": spec.params,
-    "ablation_name": spec.ablation_name,
-    "ablation_flags": spec.ablation_flags,
-    "cmd": spec.cmd,
-  }
-  have = {k: meta.get(k) for k in want.keys()}
-  return _json_dumps_stable(have) == _json_dumps_stable(want)
+  have = {k: meta.get(k) for k in _META_MATCH_KEYS}
+  if _json_dumps_canon(have) == spec.canon_want:
+    return True
+  # meta.json is normally written with sorted keys; re-sort in case it was not.
+  return _json_dumps_canon(have, sort_keys=True) == spec.canon_want
 
 
 def _should_skip(spec: RunSpec, resume: bool) -> bool:
   if not resume:
     return False
-  summary = spec.out_dir / "summary.csv"
-  meta_path = spec.run_dir / "meta.json"
-  if not summary.exists() or not meta_path.exists():
+  # A matching meta.json alone is not enough: failed runs have one too.
+  if not os.path.exists(os.path.join(spec.out_dir, "summary.csv")):
     return False
   try:
-    meta = _load_json(meta_path)
+    meta = _load_json(os.path.join(spec.run_dir, "meta.json"))
   except Exception:
     return False
   return _meta_matches(meta, spec)
 
 
+# Directories this process has created or seen; the sweep is single-threaded, so no lock.
+_dirs_done: set[str] = set()
+
+
+def _ensure_dir(p: str) -> None:
+  if p in _dirs_done:
+    return
+  os.makedirs(p, exist_ok=True)
+  # Every ancestor of a directory that exists exists too.
+  while p and p not in _dirs_done:
+    _dirs_done.add(p)
+    p = os.path.dirname(p)
+
+
+# Compact: per-run meta.json is machine-read (collect.py, --resume).
 def _write_json(path: Path, obj: Any) -> None:
-  path.parent.mkdir(parents=True, exist_ok=True)
+  _ensure_dir(str(path.parent))
   tmp = path.with_suffix(path.suffix + ".tmp")
-  with tmp.open("w", encoding="utf-8") as f:
-    json.dump(obj, f, indent=2, sort_keys=True)
-    f.write("\n")
+  if orjson is not None:
+    tmp.write_bytes(orjson.dumps(obj, option=orjson.OPT_SORT_KEYS) + b"\n")
+  else:
+    with tmp.open("w", encoding="utf-8") as f:
+      json.dump(obj, f, separators=(",", ":"), sort_keys=True)
+      f.write("\n")
   tmp.replace(path)
 
 
-def _run_one(spec: RunSpec) -> Tuple[str, int]:
-  spec.run_dir.mkdir(parents=True, exist_ok=True)
-  spec.out_dir.mkdir(parents=True, exist_ok=True)
+_LOG_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC
+# Shared logs are appended to across sweeps so offsets recorded by earlier runs stay valid.
+_SHARED_LOG_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC
+
+
+# capture_output: true -> per-run stdout.txt/stderr.txt, false -> /dev/null,
+# "shared" -> one append-only log per job slot (logs/worker_<i>.log).
+def _capture_mode(cfg: Dict[str, Any]) -> str:
+  v = cfg.get("capture_output", True)
+  if v is True:
+    return "files"
+  if v is False:
+    return "none"
+  if v == "shared":
+    return "shared"
+  raise ValueError('capture_output must be true, false or "shared"')
+
+
+# posix_spawn avoids fork's page-table copy of the driver on every launch. The child
+# runs in the current directory (main() chdirs to REPO_ROOT once). Returns the pid.
+# Like subprocess's restore_signals, SIGPIPE/SIGXFSZ (ignored by Python) are reset to
+# their defaults and the signal mask is cleared in the child.
+def _launch(cmd: List[str], stdout_fd: int, stderr_fd: int) -> int:
+  return os.posix_spawnp(
+    cmd[0],
+    cmd,
+    os.environ,
+    file_actions=[
+      (os.POSIX_SPAWN_DUP2, stdout_fd, 1),
+      (os.POSIX_SPAWN_DUP2, stderr_fd, 2),
+    ],
+    setsigmask=(),
+    setsigdef=(signal.SIGPIPE, signal.SIGXFSZ),
+  )
 
-  meta_path = spec.run_dir / "meta.json"
-  stdout_path = spec.run_dir / "stdout.txt"
-  stderr_path = spec.run_dir / "stderr.txt"
+
+# log_fd/log_path: the /dev/null or shared-log fd for the "none" and "shared" modes.
+def _spawn_one(
+  spec: RunSpec, capture: str = "files", log_fd: int = -1, log_path: str = ""
+) -> Tuple[int, Dict[str, Any], float]:
+  _ensure_dir(spec.out_dir)
+  run_dir = Path(spec.run_dir)
 
   meta: Dict[str, Any] = {
     "run_id": spec.run_id,
@@ -197,34 +428,75 @@ def _run_one(spec: RunSpec) -> Tuple[str, int]:
     "cwd": str(REPO_ROOT),
     "start_time_unix_s": time.time(),
   }
-  _write_json(meta_path, meta)
+  # meta.json is written once, when the run ends; the empty marker flags interrupted runs.
+  # Drop any meta.json from a previous attempt so an interrupted rerun is never resumed.
+  (run_dir / "meta.json").unlink(missing_ok=True)
+  (run_dir / ".started").touch()
 
   t0 = time.time()
-  with stdout_path.open("wb") as out_f, stderr_path.open("wb") as err_f:
+  if capture != "files":
+    if capture == "shared":
+      os.write(log_fd, f"=== START {spec.run_id} ===\n".encode("utf-8"))
+      meta["log_file"] = log_path
+      meta["log_offset"] = os.lseek(log_fd, 0, os.SEEK_CUR)
     try:
-      proc = subprocess.run(
-        spec.cmd,
-        cwd=str(REPO_ROOT),
-        stdout=out_f,
-        stderr=err_f,
-        check=False,
-      )
-      code = int(proc.returncode)
+      return _launch(spec.cmd, log_fd, log_fd), meta, t0
     except Exception:
-      code = 127
+      _finalize_one(spec, meta, t0, 127, log_fd)
       raise
+
+  # O_CLOEXEC: only the dup2'd copies on fds 1/2 survive into the child.
+  out_fd = os.open(run_dir / "stdout.txt", _LOG_OPEN_FLAGS, 0o644)
+  try:
+    err_fd = os.open(run_dir / "stderr.txt", _LOG_OPEN_FLAGS, 0o644)
+    try:
+      pid = _launch(spec.cmd, out_fd, err_fd)
     finally:
-      t1 = time.time()
-      meta2 = dict(meta)
-      meta2["end_time_unix_s"] = time.time()
-      meta2["wall_time_s"] = round(t1 - t0, 6)
-      meta2["exit_code"] = code
-      _write_json(meta_path, meta2)
-  return (spec.run_id, code)
+      os.close(err_fd)
+  except Exception:
+    _finalize_one(spec, meta, t0, 127)
+    raise
+  finally:
+    os.close(out_fd)
+  return pid, meta, t0
+
+
+def _finalize_one(spec: RunSpec, meta: Dict[str, Any], t0: float, code: int, log_fd: int = -1) -> int:
+  t1 = time.time()
+  meta["end_time_unix_s"] = time.time()
+  meta["wall_time_s"] = round(t1 - t0, 6)
+  meta["exit_code"] = code
+  if "log_offset" in meta:
+    # The child shared this fd's file offset, so its output ends at the current position.
+    meta["log_length"] = os.lseek(log_fd, 0, os.SEEK_CUR) - meta["log_offset"]
+    os.write(log_fd, f"=== END {spec.run_id} exit_code={code} ===\n".encode("utf-8"))
+  _write_json(Path(spec.run_dir, "meta.json"), meta)
+  return code
+
+
+_PROGRESS_FLUSH_LINES = 64
+
+
+# Most args (the sim binary, common_args flags, matrix values) repeat across every run of a
+# sweep, so each distinct one is quoted once; only per-run paths miss the cache.
+_quote_arg = functools.lru_cache(maxsize=4096)(shlex.quote)
 
 
 def _format_cmd(cmd: List[str]) -> str:
-  return " ".join(shlex.quote(x) for x in cmd)
+  return " ".join(map(_quote_arg, cmd))
+
+
+def _print_plan(plan: Iterable[Tuple[str, str, List[str]]]) -> None:
+  try:
+    for run_id, run_dir, cmd in plan:
+      print(f"- {run_id}")
+      print(f"  run_dir={run_dir}")
+      print(f"  cmd={_format_cmd(cmd)}")
+  except BrokenPipeError:
+    try:
+      sys.stdout = open(os.devnull, "w")
+    except Exception:
+      pass
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -256,64 +528,153 @@ def main(argv: Optional[List[str]] = None) -> int:
   jobs = int(args.jobs or cfg.get("jobs") or 1)
   if jobs <= 0:
     raise ValueError("--jobs must be > 0")
-
-  specs = _make_run_specs(cfg, exp_dir)
-
-  to_run: List[RunSpec] = []
-  skipped: List[RunSpec] = []
-  for s in specs:
-    if _should_skip(s, resume=bool(args.resume)):
-      skipped.append(s)
-    else:
-      to_run.append(s)
+  capture = _capture_mode(cfg)
+
+  planned_runs = _planned_runs_count(cfg)
+
+  if args.dry_run and not args.resume:
+    # Nothing can be skipped, so the plan is streamed straight from the matrix.
+    print(f"experiment: {exp_dir}")
+    print(f"planned_runs={planned_runs} to_run={planned_runs} skipped=0 jobs={jobs}")
+    _print_plan(_iter_plan(cfg, exp_dir))
+    return 0
+
+  specs: Iterator[RunSpec]
+  if args.resume:
+    # The to_run count is only known after the resume checks, so the remaining specs are kept.
+    to_run: List[RunSpec] = []
+    skipped = 0
+    # One readdir instead of stat calls for every spec that has never run.
+    runs_dir = exp_dir / "runs"
+    existing = set()
+    if runs_dir.is_dir():
+      with os.scandir(runs_dir) as it:
+        existing = {e.name for e in it if e.is_dir()}
+    for s in _iter_run_specs(cfg, exp_dir, planned_runs):
+      if s.run_id in existing and _should_skip(s, resume=True):
+        skipped += 1
+      else:
+        to_run.append(s)
+    total = len(to_run)
+    specs = iter(to_run)
+  else:
+    # Every planned run executes: specs are built one at a time as slots free up. This stays
+    # serial, since spec-building worker processes would be reaped by waitpid(-1) below.
+    skipped = 0
+    total = planned_runs
+    specs = _make_run_specs(cfg, exp_dir)
+    # Build the first spec now so config errors surface before anything is printed or created.
+    first = next(specs, None)
+    if first is not None:
+      specs = chain([first], specs)
 
   print(f"experiment: {exp_dir}")
-  print(f"planned_runs={len(specs)} to_run={len(to_run)} skipped={len(skipped)} jobs={jobs}")
+  print(f"planned_runs={planned_runs} to_run={total} skipped={skipped} jobs={jobs}")
   if args.dry_run:
-    try:
-      for s in to_run:
-        print(f"- {s.run_id}")
-        print(f"  run_dir={s.run_dir}")
-        print(f"  cmd={_format_cmd(s.cmd)}")
-      return 0
-    except BrokenPipeError:
-      try:
-        sys.stdout = open(os.devnull, "w")
-      except Exception:
-        pass
-      return 0
-
-  exp_dir.mkdir(parents=True, exist_ok=True)
-  (exp_dir / "runs").mkdir(parents=True, exist_ok=True)
+    _print_plan((s.run_id, s.run_dir, s.cmd) for s in specs)
+    return 0
+
+  _ensure_dir(str(exp_dir / "runs"))
+  # Children are spawned without a per-launch cwd; relative sim_binary paths resolve here.
+  os.chdir(REPO_ROOT)
+
+  # Each job slot runs one child at a time, so a slot's shared log is appended to serially.
+  slot_logs: List[Tuple[int, str]] = []
+  if capture == "none":
+    devnull = os.open(os.devnull, os.O_WRONLY | os.O_CLOEXEC)
+    slot_logs = [(devnull, "")] * jobs
+  elif capture == "shared":
+    _ensure_dir(str(exp_dir / "logs"))
+    for i in range(jobs):
+      path = exp_dir / "logs" / f"worker_{i}.log"
+      slot_logs.append((os.open(path, _SHARED_LOG_OPEN_FLAGS, 0o644), str(path)))
+  free_slots = list(range(jobs - 1, -1, -1))
 
   failures: List[Tuple[str, int]] = []
   completed = 0
 
-  with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as ex:
-    fut_to_spec = {ex.submit(_run_one, s): s for s in to_run}
-    for fut in concurrent.futures.as_completed(fut_to_spec):
-      spec = fut_to_spec[fut]
+  # Single-threaded supervisor: keep up to `jobs` children alive and reap them with waitpid.
+  running: Dict[int, Tuple[RunSpec, Dict[str, Any], float, int]] = {}
+  stopping = False
+  exhausted = False
+
+  def _stop() -> None:
+    nonlocal stopping
+    stopping = True
+    for pid in running:
       try:
-        run_id, code = fut.result()
-      except Exception as e:
-        failures.append((spec.run_id, 127))
-        print(f"[FAIL] {spec.run_id}: exception: {e}", file=sys.stderr)
-        if args.fail_fast:
-          for f2 in fut_to_spec:
-            f2.cancel()
+        os.kill(pid, signal.SIGTERM)
+      except OSError:
+        pass
+
+  # Progress lines are batched: one write per burst of completions instead of one per run.
+  out_buf: List[str] = []
+  err_buf: List[str] = []
+
+  def _flush_progress() -> None:
+    for buf, stream in ((out_buf, sys.stdout), (err_buf, sys.stderr)):
+      if buf:
+        data = "".join(buf)
+        buf.clear()
+        stream.write(data)
+        stream.flush()
+
+  def _progress(buf: List[str], line: str) -> None:
+    buf.append(line)
+    if len(out_buf) + len(err_buf) >= _PROGRESS_FLUSH_LINES:
+      _flush_progress()
+
+  try:
+    while running or not (stopping or exhausted):
+      while not (stopping or exhausted) and len(running) < jobs:
+        spec = next(specs, None)
+        if spec is None:
+          exhausted = True
           break
+        slot = free_slots.pop()
+        log_fd, log_path = slot_logs[slot] if slot_logs else (-1, "")
+        try:
+          pid, meta, t0 = _spawn_one(spec, capture, log_fd, log_path)
+        except Exception as e:
+          free_slots.append(slot)
+          failures.append((spec.run_id, 127))
+          _progress(err_buf, f"[FAIL] {spec.run_id}: exception: {e}\n")
+          if args.fail_fast:
+            _stop()
+          continue
+        running[pid] = (spec, meta, t0, slot)
+
+      if not running:
+        continue
+      pid, status = os.waitpid(-1, os.WNOHANG)
+      if pid == 0:
+        # Nothing has exited yet: show buffered progress before blocking.
+        _flush_progress()
+        pid, status = os.waitpid(-1, 0)
+      entry = running.pop(pid, None)
+      if entry is None:
+        continue
+      spec, meta, t0, slot = entry
+      free_slots.append(slot)
+      code = os.waitstatus_to_exitcode(status)
+      _finalize_one(spec, meta, t0, code, slot_logs[slot][0] if slot_logs else -1)
+      if stopping:
+        # Draining children terminated by --fail_fast.
         continue
 
       completed += 1
       if code == 0:
-        print(f"[OK]   {run_id} ({completed}/{len(to_run)})")
+        _progress(out_buf, f"[OK]   {spec.run_id} ({completed}/{total})\n")
       else:
-        failures.append((run_id, code))
-        print(f"[FAIL] {run_id} exit_code={code} ({completed}/{len(to_run)})", file=sys.stderr)
+        failures.append((spec.run_id, code))
+        _progress(err_buf, f"[FAIL] {spec.run_id} exit_code={code} ({completed}/{total})\n")
         if args.fail_fast:
-          for f2 in fut_to_spec:
-            f2.cancel()
-          break
+          _stop()
+  finally:
+    _flush_progress()
+
+  for fd in {fd for fd, _ in slot_logs}:
+    os.close(fd)
 
   if failures:
     print(f"failures={len(failures)}", file=sys.stderr)